@@ -4,6 +4,7 @@ set -euo pipefail
 # OKSI Software Licensing Installer
 # - Installs Python licensing app into a self-contained venv under /opt/oksi/sw-licensing
 # - Installs native fingerprint binary to /usr/local/bin/oksi_fingerprint
+# - Installs native fingerprint library next to the Python app (liboksi_fingerprint.so)
 # - Does not touch global Python modules
 #
 # Usage (remote):
@@ -14,14 +15,14 @@ set -euo pipefail
 #   OKSI_PREFIX          Install prefix for binaries (default: /usr/local)
 #   OKSI_ROOT            Install root for app (default: /opt/oksi)
 #   OKSI_PYTHON          Python interpreter to use for venv (default: python3)
-#   OKSI_SKIP_FP         If set to 1, skip installing oksi_fingerprint
+#   OKSI_SKIP_FP         If set to 1, skip installing oksi_fingerprint and liboksi_fingerprint.so
 #
 # Optional flags (when running locally):
 #   --base <url>         Override download base URL
 #   --prefix <dir>       Override /usr/local
 #   --root <dir>         Override /opt/oksi
 #   --python <path>      Override python3
-#   --skip-fingerprint   Do not install fingerprint binary
+#   --skip-fingerprint   Do not install fingerprint binary or library
 
 umask 022
 
@@ -126,6 +127,7 @@ else
   cat > "$APP_DIR/requirements.txt" << 'REQ'
 cryptography>=41.0.0
 requests>=2.31.0
+urllib3>=2.0.0
 tomli>=2.0.1; python_version < "3.11"
 tomli_w>=1.0.0
 REQ
@@ -163,6 +165,16 @@ if [[ "$INSTALL_FP" -eq 1 ]]; then
   else
     err "could not download $FP_URL — continuing without native helper (Python fallback will be used)"
   fi
+
+  FP_LIB_URL="$BASE_URL/liboksi_fingerprint-${OS}-${ARCH}.so"
+  FP_LIB_DST="$APP_DIR/app/liboksi_fingerprint.so"
+  log "Downloading fingerprint library..."
+  if download "$FP_LIB_URL" "$TMPDIR/liboksi_fingerprint.so"; then
+    install -m 0644 "$TMPDIR/liboksi_fingerprint.so" "$FP_LIB_DST"
+    log "Installed $FP_LIB_DST"
+  else
+    err "could not download $FP_LIB_URL — continuing without native library"
+  fi
 fi
 
 # 5) Write uninstall script
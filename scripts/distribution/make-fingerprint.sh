@@ -1,7 +1,8 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Build fingerprint helper for one or more targets and stage into dist/bin
+# Build fingerprint helper (executable + shared library) for one or more targets
+# and stage into dist/bin
 # Cross-compilation is supported for Linux targets when the appropriate
 # cross toolchains are installed (e.g., aarch64-linux-gnu-g++, x86_64-linux-gnu-g++).
 #
@@ -85,6 +86,15 @@ build_one() {
   cp "$bin_path" "$out"
   chmod 0755 "$out"
   echo "Wrote $out"
+
+  local lib_path="$build_dir/lib/liboksi_fingerprint.so"
+  if [[ ! -f "$lib_path" ]]; then
+    echo "Build did not produce $lib_path" >&2; return 1
+  fi
+  local lib_out="$OUT_DIR/liboksi_fingerprint-$os-$arch.so"
+  cp "$lib_path" "$lib_out"
+  chmod 0644 "$lib_out"
+  echo "Wrote $lib_out"
 }
 
 status=0
@@ -2,6 +2,11 @@
 set -euo pipefail
 
 # Package the Python licensing app into a tarball suitable for install.sh
+#
+# Variables:
+#   MYPYC=1  Also compile keygen_crypto.py with mypyc (requires mypy in the
+#            active Python). The extension is platform/CPython-specific and is
+#            imported in preference to the .py, which stays as a fallback.
 
 ROOT_DIR=$(cd "$(dirname "$0")/../.." && pwd)
 OUT_DIR="$ROOT_DIR/dist"
@@ -18,6 +23,11 @@ trap 'rm -rf "$TMPDIR"' EXIT
 
 mkdir -p "$TMPDIR/sw-licensing"
 cp -r src/sw-licensing/*.py "$TMPDIR/sw-licensing/"
+if [[ "${MYPYC:-0}" == "1" ]]; then
+  command -v mypyc >/dev/null 2>&1 || { echo "mypyc not found (pip install mypy)" >&2; exit 1; }
+  (cd "$TMPDIR/sw-licensing" && mypyc keygen_crypto.py >/dev/null && rm -rf build .mypy_cache)
+  echo "Compiled keygen_crypto with mypyc"
+fi
 if [[ -f requirements.txt ]]; then
   cp requirements.txt "$TMPDIR/requirements.txt"
 fi
@@ -21,6 +21,12 @@
 // Usage examples:
 //   ./fingerprint_cpp
 //   ./fingerprint_cpp --salt my-product-id
+//
+// Shared library:
+//   The same source is also built as liboksi_fingerprint.so (with
+//   OKSI_FINGERPRINT_LIBRARY defined) exposing the C entry point
+//   `int oksi_fingerprint(const char *salt, char *out64)` so Python can call
+//   it in-process via ctypes instead of spawning the executable.
 
 #include <array>
 #include <cstdint>
@@ -221,21 +227,10 @@ static std::string base64_urlsafe_nopad(const uint8_t *data, size_t len) {
     return out;
 }
 
-int main(int argc, char** argv) {
-    // Parse optional arguments:
-    //   --salt <value> (alias: --extra-salt)
-    //   --machine-id-file <path> (testing/override)
-    std::string salt;
-    std::string machine_id_file;
-    for (int i = 1; i < argc; ++i) {
-        std::string a = argv[i];
-        if ((a == "--salt" || a == "--extra-salt") && i + 1 < argc) {
-            salt = argv[++i];
-        } else if ((a == "--machine-id-file") && i + 1 < argc) {
-            machine_id_file = argv[++i];
-        }
-    }
-
+// Compute the fingerprint for the given machine-id file and salt.
+// Components are joined with '|' in a stable format, hashed with SHA-256,
+// and encoded in URL-safe base64 (no padding).
+static std::string compute_fingerprint(const std::string &machine_id_file, const std::string &salt) {
     // Collect input components (present parts only)
     std::vector<std::string> parts;
     std::string machine_id = machine_id_file.empty() ? read_file("/etc/machine-id") : read_file(machine_id_file);
@@ -245,18 +240,54 @@ int main(int argc, char** argv) {
     if (!salt.empty()) {
         parts.push_back(std::string("salt:") + salt);
     }
-    // Join components with '|' in a stable format
     std::string joined;
     for (size_t i = 0; i < parts.size(); ++i) {
         if (i) joined.push_back('|');
         joined += parts[i];
     }
 
-    // Hash then encode in URL-safe base64 (no padding)
     SHA256 sha;
     sha.update(joined);
     auto dig = sha.digest();
-    std::string out = base64_urlsafe_nopad(dig.data(), dig.size());
-    std::cout << out << std::endl;
+    return base64_urlsafe_nopad(dig.data(), dig.size());
+}
+
+// C ABI entry point for the shared library build (liboksi_fingerprint.so).
+//   salt:  optional NUL-terminated salt (NULL or "" for none)
+//   out64: caller-provided buffer of at least OKSI_FINGERPRINT_BUFSIZE bytes;
+//          receives the NUL-terminated fingerprint
+// Returns 0 on success, non-zero on failure.
+#define OKSI_FINGERPRINT_BUFSIZE 64
+
+extern "C" int oksi_fingerprint(const char *salt, char *out64) {
+    if (!out64) return 1;
+    try {
+        std::string out = compute_fingerprint(std::string(), salt ? std::string(salt) : std::string());
+        if (out.size() >= OKSI_FINGERPRINT_BUFSIZE) return 2;
+        memcpy(out64, out.c_str(), out.size() + 1);
+        return 0;
+    } catch (...) {
+        return 3;
+    }
+}
+
+#ifndef OKSI_FINGERPRINT_LIBRARY
+int main(int argc, char** argv) {
+    // Parse optional arguments:
+    //   --salt <value> (alias: --extra-salt)
+    //   --machine-id-file <path> (testing/override)
+    std::string salt;
+    std::string machine_id_file;
+    for (int i = 1; i < argc; ++i) {
+        std::string a = argv[i];
+        if ((a == "--salt" || a == "--extra-salt") && i + 1 < argc) {
+            salt = argv[++i];
+        } else if ((a == "--machine-id-file") && i + 1 < argc) {
+            machine_id_file = argv[++i];
+        }
+    }
+
+    std::cout << compute_fingerprint(machine_id_file, salt) << std::endl;
     return 0;
 }
+#endif
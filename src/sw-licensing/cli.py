@@ -23,50 +23,51 @@ Environment / Config
 """
 
 from __future__ import annotations
-from fingerprint import generate_fingerprint
+from fingerprint import generate_fingerprint  # memoizes the native helper result per process
 from keygen_crypto import verify_http_response_signature
 
 import argparse
-import atexit
+import collections
 import shlex
 import dataclasses
+import concurrent.futures
 import functools
-import getpass
+import itertools
 import json
 import datetime
 import os
 import pathlib
-try:
-    import readline  # builtin on Unix; provides in-process line editing/history
-except Exception:  # pragma: no cover - Windows or minimal Python builds
-    try:
-        # Windows-compatible readline implementation
-        import pyreadline3 as readline  # type: ignore
-    except Exception:
-        class _NoReadline:
-            def read_history_file(self, *a, **kw):
-                pass
-            def write_history_file(self, *a, **kw):
-                pass
-            def set_history_length(self, *a, **kw):
-                pass
-            def parse_and_bind(self, *a, **kw):
-                pass
-            def add_history(self, *a, **kw):
-                pass
-            def get_current_history_length(self):
-                return 0
-            def get_history_item(self, *a, **kw):
-                return None
-        readline = _NoReadline()  # type: ignore
-import platform
+import shutil
 import sys
-import time
 import typing as t
 
+try:
+    import tomllib as _tomllib  # py311+
+except ImportError:
+    import tomli as _tomllib  # type: ignore
+try:
+    import tomli_w as _tomli_w  # pip install tomli-w; only needed to write config
+except ImportError:
+    _tomli_w = None  # type: ignore[assignment]
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse, unquote, urljoin
 
+# Shared read-only default for dict lookups on decoded JSON; never mutate.
+_EMPTY: dict = {}
+
+_loads: t.Callable[[bytes], t.Any]
+_dumps: t.Callable[[t.Any], bytes]
+try:
+    import orjson  # optional: faster encoding/decoding of API bodies
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    _dumps = lambda obj: json.dumps(obj, separators=(",", ":")).encode("utf-8")  # noqa: E731
+
 # ----------------------------
 # Constants & Simple Utilities
 # ----------------------------
@@ -129,10 +130,50 @@ class PoolExhaustedError(LicenseError):
 class NetworkError(LicenseError):
     """Transient network or server issues."""
 
+# Exit code and message label per error class; subclasses resolve through
+# the MRO, so anything else derived from LicenseError maps to 13.
+_ERR_CODES: dict[type[LicenseError], tuple[int, str]] = {
+    AuthError: (10, "auth"),
+    PoolExhaustedError: (11, "pool exhausted"),
+    NetworkError: (12, "network"),
+    LicenseError: (13, "license"),
+}
+
+def _error_code(exc: LicenseError) -> tuple[int, str]:
+    for cls in type(exc).__mro__:
+        if cls in _ERR_CODES:
+            return _ERR_CODES[cls]
+    return _ERR_CODES[LicenseError]
+
 # -----------------------
 # Config (token storage)
 # -----------------------
 
+# Parsed config files keyed by path; an entry is reused while the file's
+# (mtime_ns, size) is unchanged, so repeated Config.load() calls in the REPL
+# skip re-reading and re-parsing the TOML.
+_TOML_CACHE: dict[pathlib.Path, tuple[int, int, dict]] = {}
+
+def _read_config_toml(path: pathlib.Path) -> dict | None:
+    """Return a copy of the parsed TOML at path ({} if unparsable), or None if missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    cached = _TOML_CACHE.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return dict(cached[2])
+    try:
+        data = _tomllib.loads(path.read_bytes().decode("utf-8"))
+    except Exception:
+        data = {}
+    _TOML_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+    return dict(data)
+
+# Token file contents keyed by path, as (st_mtime_ns, token). Kept at module
+# level because main() builds a fresh Config copy per call (REPL lines included).
+_TOKEN_FILE_CACHE: dict[pathlib.Path, tuple[int, str]] = {}
+
 @dataclasses.dataclass
 class Config:
     api_token: str | None = None
@@ -156,16 +197,8 @@ class Config:
             cfg.token_file = pathlib.Path(token_file_env)
 
         # 2) toml file (for non-token settings)
-        if CONFIG_PATH.exists():
-            try:
-                import tomllib  # py311+; use 'tomli' if older
-            except Exception:
-                import tomli as tomllib  # type: ignore
-            text = CONFIG_PATH.read_bytes()
-            try:
-                data = tomllib.loads(text.decode("utf-8"))
-            except Exception:
-                data = {}
+        data = _read_config_toml(CONFIG_PATH)
+        if data is not None:
             cfg.api_token = cfg.api_token or data.get("api_token")
             cfg.base_url = data.get("base_url", cfg.base_url)
             cfg.account_id = data.get("account_id", cfg.account_id)
@@ -174,16 +207,14 @@ class Config:
 
     def save(self) -> None:
         CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            import tomli_w  # pip install tomli-w
-        except Exception as exc:
-            raise RuntimeError("tomli-w is required to write config: pip install tomli-w") from exc
+        if _tomli_w is None:
+            raise RuntimeError("tomli-w is required to write config: pip install tomli-w")
         doc = {
             "api_token": self.api_token,
             "base_url": self.base_url,
             "account_id": self.account_id,
         }
-        CONFIG_PATH.write_bytes(tomli_w.dumps(doc).encode("utf-8"))
+        CONFIG_PATH.write_bytes(_tomli_w.dumps(doc).encode("utf-8"))
 
     # --- Token storage helpers ---
     def load_api_token(self) -> str | None:
@@ -191,18 +222,28 @@ class Config:
         if self.api_token:
             return self.api_token
         try:
-            if self.token_file.exists():
+            mtime = self.token_file.stat().st_mtime_ns
+        except OSError:
+            _TOKEN_FILE_CACHE.pop(self.token_file, None)
+            return None
+        cached = _TOKEN_FILE_CACHE.get(self.token_file)
+        if cached is not None and cached[0] == mtime:
+            tok = cached[1]
+        else:
+            try:
                 tok = self.token_file.read_text(encoding="utf-8").strip()
-                if tok:
-                    self.api_token = tok
-                    return tok
-        except Exception:
-            pass
+            except Exception:
+                return None
+            _TOKEN_FILE_CACHE[self.token_file] = (mtime, tok)
+        if tok:
+            self.api_token = tok
+            return tok
         return None
 
     def save_api_token(self, token: str) -> None:
         # Persist token to repo-local file for Docker accessibility
         self.api_token = token
+        _TOKEN_FILE_CACHE.pop(self.token_file, None)
         try:
             self.token_file.parent.mkdir(parents=True, exist_ok=True)
             self.token_file.write_text(token, encoding="utf-8")
@@ -215,54 +256,80 @@ class Config:
 
     def clear_api_token(self) -> None:
         self.api_token = None
+        _TOKEN_FILE_CACHE.pop(self.token_file, None)
         try:
             if self.token_file.exists():
                 self.token_file.unlink()
         except Exception:
             pass
         # also clear from config file if present (backward compatibility)
-        if CONFIG_PATH.exists():
-            try:
-                import tomllib  # py311+
-            except Exception:
-                import tomli as tomllib  # type: ignore
-            try:
-                data = tomllib.loads(CONFIG_PATH.read_text(encoding="utf-8"))
-            except Exception:
-                data = {}
+        data = _read_config_toml(CONFIG_PATH)
+        if data is not None:
             data.pop("api_token", None)
-            try:
-                import tomli_w
-            except Exception as exc:
-                raise RuntimeError("tomli-w is required to write config: pip install tomli-w") from exc
-            CONFIG_PATH.write_bytes(tomli_w.dumps(data).encode("utf-8"))
+            if _tomli_w is None:
+                raise RuntimeError("tomli-w is required to write config: pip install tomli-w")
+            CONFIG_PATH.write_bytes(_tomli_w.dumps(data).encode("utf-8"))
 
 # ----------------------
 # HTTP (with retries)
 # ----------------------
 
-def with_retries(fn: t.Callable[..., requests.Response]) -> t.Callable[..., requests.Response]:
+# Retries happen in the transport (urllib3), with exponential backoff plus
+# jitter and Retry-After support; only the final response reaches Python.
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.6,
+    backoff_jitter=0.5,
+    status_forcelist=_RETRY_STATUSES,
+    allowed_methods=frozenset({"GET", "POST", "DELETE"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+def with_network_errors(fn: t.Callable[..., requests.Response]) -> t.Callable[..., requests.Response]:
+    """Map transport failures and still-busy responses (after retries) to NetworkError."""
     @functools.wraps(fn)
     def wrapper(*args, **kwargs):
-        last_exc = None
-        for i in range(4):
-            try:
-                resp = fn(*args, **kwargs)
-                # Retry on 5xx and some 429s
-                if resp.status_code in (429, 500, 502, 503, 504):
-                    raise NetworkError(f"Server busy ({resp.status_code}): {resp.text[:200]}")
-                return resp
-            except (requests.RequestException, NetworkError) as exc:
-                last_exc = exc
-                time.sleep(0.6 * (2 ** i))
-        if last_exc:
-            raise NetworkError(str(last_exc))
+        try:
+            resp = fn(*args, **kwargs)
+        except requests.RequestException as exc:
+            raise NetworkError(str(exc)) from exc
+        if resp.status_code in _RETRY_STATUSES:
+            raise NetworkError(f"Server busy ({resp.status_code}): {resp.text[:200]}")
+        return resp
     return wrapper
 
 # ----------------------
 # Keygen API Client
 # ----------------------
 
+# Connection pool shared by every KeygenClient session in this process, so
+# keep-alive TCP/TLS connections survive across commands (e.g. in the REPL).
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY)
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", _HTTP_ADAPTER)
+    session.mount("http://", _HTTP_ADAPTER)
+    return session
+
+def _page_total(payload: dict) -> int | None:
+    """Total item count reported by a JSON:API list page, if any."""
+    meta = payload.get("meta") or _EMPTY
+    total = (meta.get("pagination") or _EMPTY).get("total")
+    if total is None:
+        # Keygen reports {"pages": n, "count": total} under links.meta
+        total = ((payload.get("links") or _EMPTY).get("meta") or _EMPTY).get("count")
+    return total if isinstance(total, int) else None
+
+# JSON:API body for POST /machines; the %s slots take JSON-encoded values
+# (fingerprint, metadata, license id), so only the leaves are serialized.
+_ACTIVATE_TEMPLATE = (
+    b'{"data":{"type":"machines","attributes":{"fingerprint":%s,"metadata":%s},'
+    b'"relationships":{"license":{"data":{"type":"licenses","id":%s}}}}}'
+)
+
 class KeygenClient:
     """
     Minimal wrapper. Replace placeholder endpoints with your real ones.
@@ -272,7 +339,9 @@ class KeygenClient:
     def __init__(self, cfg: Config, api_token: str):
         self.cfg = cfg
         self.api_token = api_token
-        self.session = requests.Session()
+        # Host line of the response signing string; base_url is fixed per client
+        self._host = urlparse(cfg.base_url).netloc or "api.keygen.sh"
+        self.session = _new_session()
         self.session.headers.update({
             "Accept": "application/vnd.api+json",
             "Content-Type": "application/vnd.api+json",
@@ -281,36 +350,35 @@ class KeygenClient:
         if api_token:
             self.session.headers["Authorization"] = f"Bearer {api_token}"
 
-    @with_retries
-    def _post(self, path: str, payload: dict) -> requests.Response:
+    @with_network_errors
+    def _post(self, path: str, payload: dict | bytes) -> requests.Response:
         url = f"{self.cfg.base_url}/v1/accounts/{self.cfg.account_id}{path}"
-        resp = self.session.post(url, data=json.dumps(payload), timeout=20)
+        body = payload if isinstance(payload, bytes) else _dumps(payload)
+        resp = self.session.post(url, data=body, timeout=20)
         try:
-            host = urlparse(self.cfg.base_url).netloc or "api.keygen.sh"
-            uri = unquote(resp.raw.url)
+            uri = unquote(resp.request.path_url)
             verify_http_response_signature(
                 resp,
                 uri=uri,
                 public_key_hex=DEFAULT_KEYGEN_PUBKEY,
-                host=host,
+                host=self._host,
                 method="post",
             )
         except Exception as exc:
             raise LicenseError(f"HTTP response signature verification failed: {exc}")
         return resp
 
-    @with_retries
+    @with_network_errors
     def _get(self, path: str, params: dict | None = None) -> requests.Response:
         url = f"{self.cfg.base_url}/v1/accounts/{self.cfg.account_id}{path}"
         resp = self.session.get(url, params=params or {}, timeout=20)
         try:
-            host = urlparse(self.cfg.base_url).netloc or "api.keygen.sh"
-            uri = unquote(resp.raw.url)
+            uri = unquote(resp.request.path_url)
             verify_http_response_signature(
                 resp,
                 uri=uri,
                 public_key_hex=DEFAULT_KEYGEN_PUBKEY,
-                host=host,
+                host=self._host,
                 method="get",
             )
         except Exception as exc:
@@ -333,35 +401,53 @@ class KeygenClient:
         - Does not aggregate results; callback receives the raw payload per page.
         - Uses `links.next` exclusively to advance to subsequent pages.
         - Stops when `max_pages` reached (unless `all_pages`), when `links.next` is
-          missing/null, or when `on_page` returns a falsy value to signal stop.
+          missing/null, when the reported total is covered, or when `on_page`
+          returns a falsy value to signal stop.
 
         Returns the number of pages processed.
         """
         params = dict(params or {})
-        params["page[size]"] = max(1, int(page_size))
-        params["page[number]"] = max(1, int(page_number))
+        size = max(1, int(page_size))
+        params["page[size]"] = size
+        first = max(1, int(page_number))
+        params["page[number]"] = first
         limit = (10**9) if all_pages else max(1, int(max_pages))
 
         pages = 0
+        # Items received so far, and the items on pages before `first`. The
+        # server may cap page[size] below what was asked, so the offset uses the
+        # size it actually served (len of our first page) rather than `size`.
+        seen = 0
+        offset: int | None = None
         next_absolute_url: str | None = None
+        # Prepared once for the links.next pages; only the URL changes per page,
+        # so session header/cookie merging and env settings are not redone.
+        prepped: requests.PreparedRequest | None = None
+        send_kwargs: dict = {}
 
         while pages < limit:
             # Fetch next page
             if next_absolute_url:
-                r = self.session.get(next_absolute_url, timeout=20)
+                if prepped is None:
+                    prepped = self.session.prepare_request(requests.Request("GET", next_absolute_url))
+                    send_kwargs = self.session.merge_environment_settings(
+                        next_absolute_url, {}, None, None, None
+                    )
+                else:
+                    prepped.prepare_url(next_absolute_url, None)
+                r = self.session.send(prepped, timeout=20, **send_kwargs)
                 if r.status_code == 401:
                     raise AuthError("Not authorized.")
                 if r.status_code != 200:
                     raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
                 # Verify response signature (mirror _get)
                 try:
-                    host = urlparse(self.cfg.base_url).netloc or "api.keygen.sh"
-                    uri = unquote(r.raw.url)
+                    uri = unquote(r.request.path_url)
                     verify_http_response_signature(
                         r,
                         uri=uri,
                         public_key_hex=DEFAULT_KEYGEN_PUBKEY,
-                        host=host,
+                        host=self._host,
                         method="get",
                     )
                 except Exception as exc:
@@ -373,13 +459,24 @@ class KeygenClient:
                 if r.status_code != 200:
                     raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
 
-            payload = r.json()
+            payload = _loads(r.content)
 
             pages += 1
             cont = on_page(payload, pages)
             if cont is False:
                 break
 
+            # Once the reported total is covered this is the last page, even if
+            # Keygen still sends links.next; skip the empty tail request. A short
+            # page alone proves nothing (the server may cap or filter pages).
+            n = len(payload.get("data") or ())
+            seen += n
+            if offset is None:
+                offset = (first - 1) * n
+            total = _page_total(payload)
+            if total is not None and offset + seen >= total:
+                break
+
             # Determine next page source via links
             next_link = (payload.get("links") or {}).get("next") or None
             if not next_link:
@@ -391,6 +488,97 @@ class KeygenClient:
                 base = self.cfg.base_url.rstrip('/') + '/'
                 next_absolute_url = urljoin(base, next_link.lstrip('/'))
 
+        return pages
+
+    def paginate_parallel(
+        self,
+        path: str,
+        params: dict | None,
+        page_size: int,
+        on_page: t.Callable[[dict, int], t.Optional[bool]],
+        workers: int = 4,
+    ) -> int:
+        """
+        Like `paginate_each(all_pages=True)`, but once the first page reports the
+        total item count, fetch the remaining pages concurrently.
+
+        - `on_page` is still called in page order, from the calling thread.
+        - At most `workers * 2` pages are requested ahead of the one being
+          consumed, so memory stays bounded by the window, not the pool size.
+        - Falls back to following `links.next` when no total is reported.
+
+        Returns the number of pages processed.
+        """
+        params = dict(params or {})
+        params["page[size]"] = max(1, int(page_size))
+        params["page[number]"] = 1
+
+        def fetch(number: int) -> dict:
+            r = self._get(path, params={**params, "page[number]": number})
+            if r.status_code == 401:
+                raise AuthError("Not authorized.")
+            if r.status_code != 200:
+                raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
+            return _loads(r.content)
+
+        payload = fetch(1)
+        if on_page(payload, 1) is False:
+            return 1
+
+        # The server may cap page[size] below what was asked; a first page that
+        # does not cover the total is full, so its length is the real size.
+        size = len(payload.get("data") or ())
+        total = _page_total(payload)
+        if total is not None and size >= total:
+            return 1
+        if total is None or not size:
+            if not (payload.get("links") or _EMPTY).get("next"):
+                return 1
+            return 1 + self.paginate_each(
+                path,
+                params,
+                page_size=params["page[size]"],
+                page_number=2,
+                max_pages=10**9,
+                all_pages=True,
+                on_page=lambda p, i: on_page(p, i + 1),
+            )
+        params["page[size]"] = size
+        del payload
+
+        n_pages = -(-total // size)
+        window = max(1, workers) * 2
+        pages = 1
+        numbers = iter(range(2, n_pages + 1))
+        inflight: collections.deque[concurrent.futures.Future[dict]] = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            try:
+                for number in itertools.islice(numbers, window):
+                    inflight.append(pool.submit(fetch, number))
+                while inflight:
+                    pages += 1
+                    if on_page(inflight.popleft().result(), pages) is False:
+                        break
+                    refill = next(numbers, None)
+                    if refill is not None:
+                        inflight.append(pool.submit(fetch, refill))
+            finally:
+                for fut in inflight:
+                    fut.cancel()
+        return pages
+
+    def count(self, path: str, params: dict | None = None) -> int | None:
+        """Item count the server reports for a list query (one 1-item page), if any."""
+        query = dict(params or {})
+        query["page[size]"] = 1
+        query["page[number]"] = 1
+        r = self._get(path, params=query)
+        if r.status_code == 401:
+            raise AuthError("Not authorized.")
+        if r.status_code != 200:
+            raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
+        return _page_total(_loads(r.content))
+
     # ---- Login: user/password -> token (adjust to your deployment) ----
     def login_with_credentials(self, email: str, password: str) -> str:
         """
@@ -398,21 +586,22 @@ class KeygenClient:
         """
         auth = (email, password)
 
-        # Use a temporary header set without Authorization
-        headers = {
-            "Accept": "application/vnd.api+json",
-            "Content-Type": "application/vnd.api+json",
-            "User-Agent": USER_AGENT,
-        }
+        # Drop any bearer token for this request; basic auth is applied instead.
+        # Prepared outside the session so its headers are not merged back in,
+        # but sent through it to reuse the pooled connection.
         url = f"{self.cfg.base_url}/v1/accounts/{self.cfg.account_id}/tokens"
-        r = requests.post(url, auth=auth, headers=headers, timeout=20)
+        headers = dict(self.session.headers)
+        headers.pop("Authorization", None)
+        prepped = requests.Request("POST", url, headers=headers, auth=auth).prepare()
+        send_kwargs = self.session.merge_environment_settings(url, {}, None, None, None)
+        r = self.session.send(prepped, timeout=20, **send_kwargs)
 
         if r.status_code in (401, 403):
             raise AuthError("Invalid credentials.")
         if r.status_code not in (200, 201):
             raise LicenseError(f"Login failed ({r.status_code}): {r.text[:200]}")
 
-        data = r.json()
+        data = _loads(r.content)
         # Adapt extraction to your response format:
         token = (
             data.get("data", {})
@@ -429,7 +618,7 @@ class KeygenClient:
         r = self._get("/me")
         if r.status_code == 401:
             raise AuthError("Invalid API token.")
-        return r.json()
+        return _loads(r.content)
 
     def get_machines(self, fingerprint: str, product_id: str) -> dict | None:
         params: dict[str, str] = {
@@ -442,7 +631,7 @@ class KeygenClient:
             raise AuthError("Invalid API token.")
         if r.status_code != 200:
             raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
-        return r.json()
+        return _loads(r.content)
 
     def retrieve_machine(self, fingerprint: str) -> dict | None:
         """Retrieve machine details by fingerprint. Returns None if not found (404)."""
@@ -453,7 +642,7 @@ class KeygenClient:
             return None
         if r.status_code != 200:
             raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
-        return r.json()
+        return _loads(r.content)
 
     def get_unactivated_license(self, product_id: str | None = None) -> dict | None:
         """
@@ -470,26 +659,17 @@ class KeygenClient:
             raise AuthError("Invalid API token.")
         if r.status_code not in (200, 201):
             raise LicenseError(f"Request failed ({r.status_code}): {r.text[:200]}")
-        return r.json()
+        return _loads(r.content)
 
     def activate(self, fingerprint: str, license_id: str, metadata: dict | None = None) -> dict:
         """
         Activate this machine (by fingerprint) against the given license ID.
         """
-        payload = {
-            "data": {
-                "type": "machines",
-                "attributes": {
-                    "fingerprint": fingerprint,
-                    "metadata": metadata or {},
-                },
-                "relationships": {
-                    "license": {
-                        "data": { "type": "licenses", "id": license_id }
-                    }
-                }
-            }
-        }
+        payload = _ACTIVATE_TEMPLATE % (
+            _dumps(fingerprint),
+            _dumps(metadata or {}),
+            _dumps(license_id),
+        )
         r = self._post("/machines", payload)
         if r.status_code == 401:
             raise AuthError("Token lacks activation rights.")
@@ -497,7 +677,7 @@ class KeygenClient:
             raise PoolExhaustedError("No remaining activations.")
         if r.status_code not in (200, 201):
             raise LicenseError(f"Activation failed ({r.status_code}): {r.text[:500]}")
-        return r.json()
+        return _loads(r.content)
 
     def deactivate(self, machine_id: str) -> None:
         r = self.session.delete(
@@ -530,6 +710,7 @@ def cmd_login(cfg: Config, client: KeygenClient, args: argparse.Namespace) -> in
             print("[error] empty password from stdin", file=sys.stderr)
             return 2
     else:
+        import getpass
         password = os.getenv("KEYGEN_PASSWORD") or getpass.getpass("Password: ")
 
     token = client.login_with_credentials(email=email, password=password)
@@ -557,81 +738,97 @@ def cmd_whoami(client: KeygenClient, _args: argparse.Namespace) -> int:
 def cmd_list_products(client: KeygenClient, _args: argparse.Namespace) -> int:
     print("Name (id)")
     def on_page(payload: dict, _page_idx: int) -> bool:
-        items = payload.get("data", []) if isinstance(payload, dict) else []
+        items = payload.get("data", ()) if isinstance(payload, dict) else ()
         for it in items:
             pid = it.get("id")
-            name = (it.get("attributes", {}) or {}).get("name")
+            name = (it.get("attributes") or _EMPTY).get("name")
             print(f"{name}\t({pid})")
         return True
-    client.paginate_each(
+    client.paginate_parallel(
         path="/products",
-        params={},
+        params={"fields[products]": "name"},
         page_size=100,
-        page_number=1,
-        max_pages=10**9,
-        all_pages=True,
         on_page=on_page,
     )
     return 0
 
 def cmd_status(client: KeygenClient, args: argparse.Namespace) -> int:
+    if getattr(args, "server_counts", False):
+        rc = _status_from_server_counts(client)
+        if rc is not None:
+            return rc
+        print("[warning] server did not report license counts; listing licenses instead", file=sys.stderr)
+
+    fromisoformat = datetime.datetime.fromisoformat
+    utc = datetime.timezone.utc
+    # One clock read per command; the per-license check runs for every item.
+    now = datetime.datetime.now(utc)
+
     def parse_expiry(exp: str | None) -> datetime.datetime | None:
         if not exp:
             return None
         try:
-            # Support "Z" suffix and timezone-aware parsing
-            iso = exp.replace("Z", "+00:00")
-            return datetime.datetime.fromisoformat(iso)
+            # Keygen timestamps end in "Z"; attach UTC directly rather than
+            # rewriting the string (fromisoformat only accepts "Z" on 3.11+)
+            if exp[-1] == "Z":
+                return fromisoformat(exp[:-1]).replace(tzinfo=utc)
+            return fromisoformat(exp)
         except Exception:
             return None
 
     def is_active_license(item: dict) -> bool:
-        attrs = item.get("attributes", {}) if isinstance(item, dict) else {}
-        status = str(attrs.get("status", "")).upper()
-        suspended = bool(attrs.get("suspended", False))
+        attrs = item.get("attributes", _EMPTY) if isinstance(item, dict) else _EMPTY
+        # Keygen returns status uppercase; cheapest checks first
+        if attrs.get("status") not in ("ACTIVE", "active") or attrs.get("suspended", False):
+            return False
+        machines = item.get("relationships", _EMPTY).get("machines", _EMPTY)
+        if not machines.get("meta", _EMPTY).get("count", 0) > 0:
+            return False
         expiry_dt = parse_expiry(attrs.get("expiry"))
-        now = datetime.datetime.now(datetime.timezone.utc)
-        if expiry_dt is not None and expiry_dt.tzinfo is None:
-            expiry_dt = expiry_dt.replace(tzinfo=datetime.timezone.utc)
-        not_expired = (expiry_dt is None) or (expiry_dt > now)
-        activated = item.get("relationships", {}).get("machines", {}).get("meta", {}).get("count", 0) > 0
-        return (status == "ACTIVE") and (not suspended) and not_expired and activated
-
-    total = 0
-    activated_total = 0
-
-    # Per-product tallies
-    # structure: { product_id: { 'total': int, 'activated': int } }
-    per_product: dict[str, dict[str, int]] = {}
+        if expiry_dt is None:
+            return True
+        if expiry_dt.tzinfo is None:
+            expiry_dt = expiry_dt.replace(tzinfo=utc)
+        return expiry_dt > now
+
+    # Collect one product id per license (and per activated license) while
+    # pages stream in, then tally both columns at once with Counter (C-level
+    # counting) instead of updating per-product dicts record by record.
+    product_ids: list[str | None] = []
+    activated_ids: list[str | None] = []
 
     def on_page(payload: dict, _page_idx: int) -> bool:
-        nonlocal total, activated_total
-        items = payload.get("data", []) if isinstance(payload, dict) else []
+        items = payload.get("data", ()) if isinstance(payload, dict) else ()
         for it in items:
-            total += 1
-            rel = (it.get("relationships") or {}).get("product") or {}
-            pid = ((rel.get("data") or {}) or {}).get("id")
-            # Ensure a product bucket exists
-            if pid:
-                bucket = per_product.setdefault(pid, {"total": 0, "activated": 0})
-                bucket["total"] += 1
+            rel = (it.get("relationships") or _EMPTY).get("product") or _EMPTY
+            pid = (rel.get("data") or _EMPTY).get("id")
+            product_ids.append(pid)
             # Count activated license if it meets criteria
             if is_active_license(it):
-                activated_total += 1
-                if pid:
-                    per_product[pid]["activated"] += 1
+                activated_ids.append(pid)
         return True
 
-    client.paginate_each(
+    # Sparse fieldsets: only the attributes/relationships read above, at
+    # Keygen's maximum page size, to cut both round-trips and body size.
+    client.paginate_parallel(
         path="/licenses",
-        params={},
-        page_size=50,
-        page_number=1,
-        max_pages=10**9,
-        all_pages=True,
+        params={"fields[licenses]": "status,suspended,expiry,product,machines"},
+        page_size=100,
         on_page=on_page,
     )
 
+    total = len(product_ids)
+    activated_total = len(activated_ids)
+
+    # Per-product tallies
+    # structure: { product_id: { 'total': int, 'activated': int } }
+    activated_by_product = collections.Counter(activated_ids)
+    per_product: dict[str, dict[str, int]] = {
+        pid: {"total": n, "activated": activated_by_product[pid]}
+        for pid, n in collections.Counter(product_ids).items()
+        if pid
+    }
+
     # Print per-product breakdown (by product ID)
     if per_product:
         print("[info] licenses by product:")
@@ -646,6 +843,56 @@ def cmd_status(client: KeygenClient, args: argparse.Namespace) -> int:
     print(f"[info] licenses (all): total={total} activated={activated_total} inactive={inactive_total}")
     return 0
 
+# Server-side equivalent of is_active_license: Keygen's computed status is
+# ACTIVE only when the license is neither suspended nor expired, and
+# `activated` keeps licenses with at least one machine.
+_ACTIVATED_FILTER = {"status": "ACTIVE", "activated": "true"}
+
+def _status_from_server_counts(client: KeygenClient) -> int | None:
+    """`status --server-counts`: two count queries per product instead of listing every license.
+
+    Returns None, printing nothing, if any count is missing from the responses,
+    so the caller can fall back to the client-side tally.
+    """
+    product_ids: list[str] = []
+
+    def on_page(payload: dict, _page_idx: int) -> bool:
+        product_ids.extend(it["id"] for it in payload.get("data", ()) if it.get("id"))
+        return True
+
+    client.paginate_parallel(
+        path="/products",
+        params={"fields[products]": "name"},
+        page_size=100,
+        on_page=on_page,
+    )
+
+    scopes: list[dict[str, str]] = [{}] + [{"product": pid} for pid in product_ids]
+    queries = [q for scope in scopes for q in (scope, {**scope, **_ACTIVATED_FILTER})]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        reported = list(pool.map(lambda q: client.count("/licenses", q), queries))
+    counts = [c for c in reported if c is not None]
+    if len(counts) != len(reported):
+        return None
+
+    total, activated_total = counts[0], counts[1]
+    rows = sorted(
+        (pid, counts[2 * i], counts[2 * i + 1])
+        for i, pid in enumerate(product_ids, start=1)
+        if counts[2 * i]
+    )
+    if rows:
+        print("[info] licenses by product:")
+        for pid, tot, act in rows:
+            print(f" {pid}: total={tot} activated={act} inactive={tot - act}")
+    print(f"[info] licenses (all): total={total} activated={activated_total} inactive={total - activated_total}")
+    return 0
+
+@functools.lru_cache(maxsize=1)
+def _hostname() -> str:
+    import platform
+    return platform.node()
+
 def cmd_activate(client: KeygenClient, args: argparse.Namespace) -> int:
     fingerprint = args.fingerprint or generate_fingerprint()
     target_product_id = args.product_id
@@ -664,7 +911,7 @@ def cmd_activate(client: KeygenClient, args: argparse.Namespace) -> int:
 
     license_key = unactivated_license["data"][0].get("attributes", {}).get("key")
 
-    meta = {"hostname": platform.node()}
+    meta = {"hostname": _hostname()}
     resp = client.activate(fingerprint, license_id=unactivated_license["data"][0]["id"], metadata=meta)
 
     # Persist license key to plaintext file named license.<product_id>.key
@@ -700,30 +947,26 @@ def cmd_deactivate(client: KeygenClient, args: argparse.Namespace) -> int:
     print(f"[info] deactivated machine {fingerprint}")
     return 0
 
-def cmd_validate_key(cfg: Config, args: argparse.Namespace) -> int:
+def cmd_validate_key(client: KeygenClient, args: argparse.Namespace) -> int:
     fingerprint = args.fingerprint or generate_fingerprint()
     license_key = (args.license_key or "").strip()
     if not license_key:
         print('[error] license key is empty', file=sys.stderr)
         return 1
-    res = requests.post(
-        f"{cfg.base_url}/v1/accounts/{cfg.account_id}/licenses/actions/validate-key",
-        headers={
-            "Content-Type": "application/vnd.api+json",
-            "Accept": "application/vnd.api+json"
-        },
-        data=json.dumps({
+    res = client._post(
+        "/licenses/actions/validate-key",
+        {
             "meta": {
                 "key": license_key,
                 "scope": {
                     "fingerprint": fingerprint
                 }
             }
-        })
+        },
     )
     if res.status_code not in (200, 201):
         raise LicenseError(f"Validation failed ({res.status_code}): {res.text[:500]}")
-    data = res.json()
+    data = _loads(res.content)
     code = data.get("meta", {}).get("code")
     if code == "VALID":
         print(f"[info] license key is valid for this machine (fingerprint: {fingerprint})")
@@ -745,14 +988,17 @@ def ensure_token(cfg: Config, cli_token: str | None) -> str:
 # Argparse
 # ------------------------
 
+@functools.lru_cache(maxsize=1)
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
         prog="oksi-sw-license",
         description="OKSI Software Licensing CLI (customer-facing)",
     )
     p.add_argument("--api-token", help="API token (overrides config/env)")
-    p.add_argument("--base-url", default=DEFAULT_BASE_URL)
-    p.add_argument("--account-id", default=DEFAULT_ACCOUNT_ID)
+    # No argparse defaults here: Config supplies them, and a REPL line that
+    # omits these flags must not reset the session's values.
+    p.add_argument("--base-url", help=f"Keygen API base URL (default: {DEFAULT_BASE_URL})")
+    p.add_argument("--account-id", help=f"Keygen account ID (default: {DEFAULT_ACCOUNT_ID})")
     p.add_argument("--interactive", action="store_true", help="Start interactive mode (REPL)")
     p.add_argument("--version", action="version", version=f"%(prog)s {CLI_VERSION}")
 
@@ -769,7 +1015,12 @@ def build_parser() -> argparse.ArgumentParser:
 
     sub.add_parser("whoami", help="Show authenticated identity")
 
-    sub.add_parser("status", help="Show license pool status")
+    sub_status = sub.add_parser("status", help="Show license pool status")
+    sub_status.add_argument(
+        "--server-counts",
+        action="store_true",
+        help="Ask the server for counts per product instead of listing every license (faster for large pools)",
+    )
 
     sub_activate = sub.add_parser("activate", help="Activate this machine")
     sub_activate.add_argument("product_id", help="Product to activate against")
@@ -804,36 +1055,77 @@ def run_once(cfg: Config, parser: argparse.ArgumentParser, args: argparse.Namesp
     cfg.account_id = args.account_id or cfg.account_id
 
     # Dispatch a single command invocation
-    if args.cmd == "login":
-        bare = KeygenClient(cfg, api_token="")
-        return cmd_login(cfg, bare, args)
+    no_token = _CMDS_NO_TOKEN.get(args.cmd)
+    if no_token is not None:
+        return no_token(cfg, args)
 
-    if args.cmd == "logout":
-        return cmd_logout(cfg, None, args)
-
-    if args.cmd == "validate-key":
-        return cmd_validate_key(cfg, args)
+    with_token = _CMDS_WITH_TOKEN.get(args.cmd)
+    if with_token is None:
+        parser.print_help()
+        return 1
 
     # For all other commands, ensure we have a token
     token = ensure_token(cfg, args.api_token)
-    client = KeygenClient(cfg, token)
-
-    if args.cmd == "whoami":
-        return cmd_whoami(client, args)
-    if args.cmd == "status":
-        return cmd_status(client, args)
-    if args.cmd == "list-products":
-        return cmd_list_products(client, args)
-    if args.cmd == "activate":
-        return cmd_activate(client, args)
-    if args.cmd == "deactivate":
-        return cmd_deactivate(client, args)
-
-    parser.print_help()
-    return 1
-
-
-def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
+    return with_token(KeygenClient(cfg, token), args)
+
+# Dispatch tables. Keys are string literals, which CPython interns, and a
+# lookup checks the cached hash and identity before comparing characters,
+# so interning args.cmd first would only add an intern-table lookup.
+#
+# Commands that run without a stored token (validate-key uses a bare client)
+_CMDS_NO_TOKEN: dict[str, t.Callable[[Config, argparse.Namespace], int]] = {
+    "login": lambda cfg, args: cmd_login(cfg, KeygenClient(cfg, api_token=""), args),
+    "logout": lambda cfg, args: cmd_logout(cfg, None, args),
+    "validate-key": lambda cfg, args: cmd_validate_key(KeygenClient(cfg, api_token=""), args),
+}
+
+_CMDS_WITH_TOKEN: dict[str, t.Callable[[KeygenClient, argparse.Namespace], int]] = {
+    "whoami": cmd_whoami,
+    "status": cmd_status,
+    "list-products": cmd_list_products,
+    "activate": cmd_activate,
+    "deactivate": cmd_deactivate,
+}
+
+@functools.lru_cache(maxsize=None)
+def _get_readline():
+    """Import readline on first use; only the interactive REPL needs it."""
+    try:
+        import readline  # builtin on Unix; provides in-process line editing/history
+    except Exception:  # pragma: no cover - Windows or minimal Python builds
+        try:
+            # Windows-compatible readline implementation
+            import pyreadline3 as readline  # type: ignore
+        except Exception:
+            class _NoReadline:
+                def read_history_file(self, *a, **kw):
+                    pass
+                def write_history_file(self, *a, **kw):
+                    pass
+                def set_history_length(self, *a, **kw):
+                    pass
+                def parse_and_bind(self, *a, **kw):
+                    pass
+                def add_history(self, *a, **kw):
+                    pass
+                def get_current_history_length(self):
+                    return 0
+                def get_history_item(self, *a, **kw):
+                    return None
+            readline = _NoReadline()  # type: ignore
+    return readline
+
+# Set once the atexit history writer is registered, so re-entering the REPL
+# (e.g. from tests) does not stack duplicate writers
+_HISTORY_REGISTERED = False
+# Set when the REPL adds a history entry; the exit writer skips clean sessions
+_history_dirty = False
+
+def _install_readline():
+    """Import readline and set up persistent history; only the REPL calls this."""
+    import atexit
+
+    readline = _get_readline()
     # Setup history: load existing, persist on exit
     try:
         HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -849,10 +1141,32 @@ def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
             readline.parse_and_bind("set editing-mode emacs")
         except Exception:
             pass
-        atexit.register(lambda: _write_history_safely())
+        global _HISTORY_REGISTERED
+        if not _HISTORY_REGISTERED:
+            atexit.register(_write_history_safely)
+            _HISTORY_REGISTERED = True
     except Exception:
         # History is best-effort; continue without persistence if setup fails
         pass
+    return readline
+
+_EXIT_CMDS = frozenset({"exit", "quit", "q"})
+# Subcommands that take no arguments; a bare REPL line naming one skips
+# argparse after its first use
+_NOARG_CMDS = frozenset({"whoami", "status", "list-products", "logout"})
+_HELP_CMDS = frozenset({"help", "?"})
+
+def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
+    global _history_dirty
+    readline = _install_readline()
+    # Last history entry, tracked locally after one lookup (covers loaded history)
+    try:
+        hlen = readline.get_current_history_length()
+        last_line = readline.get_history_item(hlen) if hlen > 0 else None
+    except Exception:
+        last_line = None
+
+    noarg_args: dict[str, argparse.Namespace] = {}
 
     print("[interactive] OKSI License CLI — type 'help' or 'exit'")
     try:
@@ -865,19 +1179,20 @@ def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
             if not line:
                 continue
             # Add to history if not a duplicate of the previous entry
-            try:
-                hlen = readline.get_current_history_length()
-                last = readline.get_history_item(hlen) if hlen > 0 else None
-                if line and line != last:
+            if line != last_line:
+                try:
                     readline.add_history(line)
-            except Exception:
-                pass
-            if line.lower() in {"exit", "quit", "q"}:
+                except Exception:
+                    pass
+                last_line = line
+                _history_dirty = True
+            low = line.lower()
+            if low in _EXIT_CMDS:
                 break
-            if line.lower() in {"help", "?"}:
+            if low in _HELP_CMDS:
                 parser.print_help()
                 continue
-            if line.lower().startswith("help "):
+            if low.startswith("help "):
                 # Translate to "<cmd> --help"
                 rest = line.split(None, 1)[1]
                 line = rest + " --help"
@@ -888,30 +1203,28 @@ def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
                 print(f"[error] parse: {e}")
                 continue
 
-            try:
-                args = parser.parse_args(tokens)
-            except SystemExit as e:
-                # argparse error/help for the line; don't exit REPL
-                # e.code may be 0 for --help or 2 for parse error
-                continue
+            if len(tokens) == 1 and tokens[0] in _NOARG_CMDS:
+                # Bare verb: reuse the namespace argparse produced the first time
+                args = noarg_args.get(tokens[0])
+                if args is None:
+                    args = noarg_args[tokens[0]] = parser.parse_args(tokens)
+                args = argparse.Namespace(**vars(args))
+            else:
+                try:
+                    args = parser.parse_args(tokens)
+                except SystemExit as e:
+                    # argparse error/help for the line; don't exit REPL
+                    # e.code may be 0 for --help or 2 for parse error
+                    continue
 
             try:
                 code = run_once(cfg, parser, args)
             except SystemExit as e:
                 # Handle any direct sys.exit from subcommands
                 code = int(e.code) if isinstance(e.code, int) else 1
-            except AuthError as e:
-                print(f"[error] auth: {e}")
-                code = 10
-            except PoolExhaustedError as e:
-                print(f"[error] pool exhausted: {e}")
-                code = 11
-            except NetworkError as e:
-                print(f"[error] network: {e}")
-                code = 12
             except LicenseError as e:
-                print(f"[error] license: {e}")
-                code = 13
+                code, label = _error_code(e)
+                print(f"[error] {label}: {e}")
             except KeyboardInterrupt:
                 print()
                 continue
@@ -923,38 +1236,59 @@ def interactive_loop(cfg: Config, parser: argparse.ArgumentParser) -> int:
     return 0
 
 def _write_history_safely() -> None:
+    # Nothing new this session: leave the file alone
+    if not _history_dirty:
+        return
+    # Write beside the real file and swap it in, so an interrupted write
+    # never leaves a truncated history behind
+    tmp = HISTORY_FILE.with_name(HISTORY_FILE.name + ".tmp")
     try:
         HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        readline.write_history_file(str(HISTORY_FILE))
+        _get_readline().write_history_file(str(tmp))
+        # Keep the existing file's mode (e.g. 0600) instead of the umask default
+        try:
+            shutil.copymode(HISTORY_FILE, tmp)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, HISTORY_FILE)
     except Exception:
-        pass
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+# Config as loaded from env/files, read once per process. Never mutated:
+# main() works on a copy, so one call's flags or token changes cannot leak
+# into the next.
+_CACHED_CFG: Config | None = None
+
+def _get_config() -> Config:
+    global _CACHED_CFG
+    if _CACHED_CFG is None:
+        _CACHED_CFG = Config.load()
+    return _CACHED_CFG
 
 def main(argv: list[str] | None = None) -> int:
     argv = argv or sys.argv[1:]
-    cfg = Config.load()
     parser = build_parser()
     args = parser.parse_args(argv)
 
     # If interactive mode requested, drop into REPL (apply any global overrides once)
-    cfg.base_url = args.base_url or cfg.base_url
-    cfg.account_id = args.account_id or cfg.account_id
+    loaded = _get_config()
+    cfg = dataclasses.replace(
+        loaded,
+        base_url=args.base_url or loaded.base_url,
+        account_id=args.account_id or loaded.account_id,
+    )
     if getattr(args, "interactive", False):
         return interactive_loop(cfg, parser)
 
     try:
         return run_once(cfg, parser, args)
-    except AuthError as e:
-        print(f"[error] auth: {e}", file=sys.stderr)
-        return 10
-    except PoolExhaustedError as e:
-        print(f"[error] pool exhausted: {e}", file=sys.stderr)
-        return 11
-    except NetworkError as e:
-        print(f"[error] network: {e}", file=sys.stderr)
-        return 12
     except LicenseError as e:
-        print(f"[error] license: {e}", file=sys.stderr)
-        return 13
+        code, label = _error_code(e)
+        print(f"[error] {label}: {e}", file=sys.stderr)
+        return code
     except KeyboardInterrupt:
         return 130
 
@@ -1,10 +1,42 @@
 # fingerprint.py
 import base64
+import ctypes
 import hashlib
 import pathlib
 import subprocess
 import shutil
 
+# Resolved once at import; PATH lookups are not repeated per call.
+_CPP_EXE_NAME = "oksi_fingerprint"
+_CPP_EXE_ON_PATH = shutil.which(_CPP_EXE_NAME)
+
+# Shared-library build of the C++ helper; must hold the 43-char output + NUL.
+_CPP_LIB_NAME = "liboksi_fingerprint.so"
+_CPP_LIB_BUFSIZE = 64
+
+def _load_cpp_library():
+    """
+    Load liboksi_fingerprint.so from next to this file, or from the default
+    dynamic loader search path. Returns the bound `oksi_fingerprint` function,
+    or None if the library is unavailable.
+    """
+    here = pathlib.Path(__file__).parent
+    for cand in (here / _CPP_LIB_NAME, _CPP_LIB_NAME):
+        try:
+            fn = ctypes.CDLL(str(cand)).oksi_fingerprint
+        except (OSError, AttributeError):
+            continue
+        fn.argtypes = (ctypes.c_char_p, ctypes.c_char_p)
+        fn.restype = ctypes.c_int
+        return fn
+    return None
+
+_CPP_LIB_FN = _load_cpp_library()
+
+# Native helper results per salt. Only successes are stored, so a transient
+# failure of the library/executable falls back for that call alone.
+_CPP_RESULTS: dict[str | None, str] = {}
+
 def _read_text(path: str) -> str:
     try:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
@@ -15,13 +47,22 @@ def _read_text(path: str) -> str:
 def _try_cpp_fingerprint(extra_salt: str | None = None) -> str | None:
     """
     Try to compute the fingerprint using the compiled C++ helper if available.
-    Looks for an executable named 'oksi_fingerprint' (installed via CMake)
+    Prefers the in-process shared library (liboksi_fingerprint.so); otherwise
+    looks for an executable named 'oksi_fingerprint' (installed via CMake)
     either in PATH or next to this file.
     Returns the fingerprint string on success, or None if unavailable/failed.
     """
-    exe_name = "oksi_fingerprint"
+    if _CPP_LIB_FN is not None:
+        try:
+            buf = ctypes.create_string_buffer(_CPP_LIB_BUFSIZE)
+            salt = str(extra_salt).encode("utf-8") if extra_salt else None
+            if _CPP_LIB_FN(salt, buf) == 0 and buf.value:
+                return buf.value.decode("ascii")
+        except Exception:
+            pass
+
     here = pathlib.Path(__file__).parent
-    candidates = [shutil.which(exe_name), here / exe_name]
+    candidates = [_CPP_EXE_ON_PATH, here / _CPP_EXE_NAME]
     for cand in candidates:
         if not cand:
             continue
@@ -50,10 +91,17 @@ def generate_fingerprint(extra_salt: str | None = None) -> str:
     - OS release
 
     Output: URL-safe base64 of SHA-256 digest.
+
+    The inputs are fixed for the life of the process, so a native result is
+    cached per `extra_salt`; the Python fallback is cheap and recomputed.
     """
     # Prefer the C++ implementation if present
+    cpp = _CPP_RESULTS.get(extra_salt)
+    if cpp:
+        return cpp
     cpp = _try_cpp_fingerprint(extra_salt)
     if cpp:
+        _CPP_RESULTS[extra_salt] = cpp
         return cpp
 
     components: list[str] = []
@@ -64,7 +112,7 @@ def generate_fingerprint(extra_salt: str | None = None) -> str:
         components.append(f"mid:{machine_id}")
 
     # # MAC (best-effort); if randomized or virtualized it may change.
-    # import uuid
+    # # If re-enabled, add `import uuid` at module top (not inside this function).
     # mac = uuid.getnode()
     # components.append(f"mac:{mac:012x}")
 
@@ -4,24 +4,29 @@ Minimal helpers to parse, verify, and decrypt Keygen certificates.
 Public API surface:
 - parse_certificate(cert_text: str) -> Certificate
 - verify_signature(cert: Certificate, public_key_hex: Optional[str]) -> None
+- verify_signature_bytes(cert: Certificate, public_key: Optional[bytes]) -> None
 - verify_http_response_signature(res, uri: str, public_key_hex: str, *, host: str = "api.keygen.sh", method: str = "get") -> None
 - decrypt_payload(cert: Certificate, *, license_key: str, machine_fingerprint: Optional[str] = None) -> Dict[str, Any]
+- decrypt_payloads(items: Iterable[Tuple[Certificate, str, Optional[str]]]) -> List[Dict[str, Any]]
 
 Notes
 - Parsing is tolerant of CRLF newlines and multi-line base64 payloads.
 - AES-GCM decryption validates IV/tag sizes and wraps errors with clearer messages.
+- Ed25519 verification is done natively by OpenSSL through `cryptography`.
 """
 
 import base64
+import functools
 import hashlib
+import hmac
 import json
 import re
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, Iterable
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 
 from urllib.parse import quote
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 __all__ = [
     "Certificate",
@@ -29,8 +34,10 @@ __all__ = [
     "UnsupportedAlgorithmError",
     "parse_certificate",
     "verify_signature",
+    "verify_signature_bytes",
     "verify_http_response_signature",
     "decrypt_payload",
+    "decrypt_payloads",
 ]
 
 @dataclass(frozen=True, slots=True)
@@ -40,33 +47,76 @@ class Certificate:
     enc: str             # encrypted or base64 payload
     sig: Optional[str]   # base64 signature over f"{kind.lower()}/{enc}"
     meta: Optional[dict] # includes "expiry" (TTL of the file)
-    raw_text: str        # full PEM-ish certificate text
+    # The original PEM-ish text is not retained; enc/sig carry everything
+    # needed to verify and decrypt, and cached certificates stay small.
 
 class LicenseFileError(Exception): ...
 class UnsupportedAlgorithmError(LicenseFileError): ...
 
+_CERT_KINDS = frozenset({"LICENSE", "MACHINE"})
+
+# Header line; the payload and matching footer are matched from its end.
+_CERT_HEADER_RE = re.compile(r"\s*-----BEGIN (?P<kind>[A-Z][A-Z ]*) FILE-----[ \t]*(?:\r\n|\r|\n)")
+_CERT_FOOTERS = {kind: f"-----END {kind} FILE-----" for kind in _CERT_KINDS}
+_CERT_BODY_RES = {
+    kind: re.compile(r"(?P<body>.*?)(?<![^\r\n])[ \t]*" + re.escape(footer) + r"\s*\Z", re.S)
+    for kind, footer in _CERT_FOOTERS.items()
+}
+
 def b64_any_decode(s: str) -> bytes:
     """Decode a base64 or urlsafe-base64 string, tolerating missing padding.
 
-    Raises ValueError if decoding fails for both variants.
-    """
-    def _pad(x: str) -> str:
-        return x + "=" * (-len(x) % 4)
+    The alphabet is chosen by inspecting the input ('-' or '_' means urlsafe),
+    so exactly one decode is attempted. Malformed payloads are caught
+    downstream (JSON parsing, IV/tag length checks).
 
-    # Try strict first to catch garbage early; fall back to urlsafe.
-    try:
-        return base64.b64decode(_pad(s), validate=True)
-    except Exception:
-        pass
+    Raises ValueError if decoding fails.
+    """
+    padded = s + "=" * (-len(s) % 4)
     try:
-        return base64.urlsafe_b64decode(_pad(s))
+        if "-" in s or "_" in s:
+            return base64.urlsafe_b64decode(padded)
+        return base64.b64decode(padded)
     except Exception as exc:
         raise ValueError("invalid base64 encoding") from exc
 
 
-def _strip_and_join_base64(lines: Iterable[str]) -> str:
-    """Normalize multi-line/CRLF base64 by stripping whitespace and joining."""
-    return "".join((ln.strip() for ln in lines if ln.strip()))
+# Constant parts of the Keygen response signing string, pre-encoded.
+_SIG_REQUEST_TARGET = b"(request-target): "
+_SIG_HOST = b"\nhost: "
+_SIG_DATE = b"\ndate: "
+_SIG_DIGEST = b"\ndigest: "
+_SIG_DIGEST_PREFIX = b"sha-256="
+
+
+@functools.lru_cache(maxsize=256)
+def _quote_request_target(uri: str) -> str:
+    """Percent-encode a request URI for the signing string (memoized; endpoints repeat)."""
+    return quote(uri, safe="/?=&")
+
+
+def _sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+@functools.lru_cache(maxsize=8)
+def _load_ed25519(public_key_hex: str) -> Ed25519PublicKey:
+    """Parse a hex-encoded Ed25519 public key once and reuse the key object."""
+    return _load_ed25519_bytes(bytes.fromhex(public_key_hex))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_ed25519_bytes(public_key: bytes) -> Ed25519PublicKey:
+    """Build an Ed25519 key object from raw 32-byte key material once and reuse it."""
+    return Ed25519PublicKey.from_public_bytes(public_key)
+
+
+_B64_STRIP = str.maketrans("", "", " \t\r\n\x0b\x0c")
+
+
+def _strip_base64_whitespace(text: str) -> str:
+    """Normalize multi-line/CRLF base64 by deleting all whitespace in one pass."""
+    return text.translate(_B64_STRIP)
 
 # ---------------------------
 # Public: Parse + verify + decrypt
@@ -80,22 +130,28 @@ def parse_certificate(cert_text: str) -> Certificate:
     if not isinstance(cert_text, str):
         raise LicenseFileError("certificate must be a string")
 
-    lines = cert_text.splitlines()
-    if not lines:
+    if not cert_text:
         raise LicenseFileError("empty certificate")
 
-    first = lines[0].strip()
-    if not first.startswith("-----BEGIN ") or not first.endswith(" FILE-----"):
+    header = _CERT_HEADER_RE.match(cert_text)
+    if header is None:
         raise LicenseFileError("malformed certificate header")
-    kind = first.replace("-----BEGIN ", "").replace(" FILE-----", "").strip()
-    if kind not in {"LICENSE", "MACHINE"}:
+    kind = header.group("kind")
+    if kind not in _CERT_KINDS:
         raise LicenseFileError(f"unsupported certificate kind: {kind}")
 
-    expected_footer = f"-----END {kind} FILE-----"
-    if not lines[-1].strip() == expected_footer:
+    # Reject a missing/mismatched footer from the tail alone, before touching the body.
+    # Scan back over trailing whitespace instead of rstrip() to avoid copying.
+    end = len(cert_text)
+    while end and cert_text[end - 1].isspace():
+        end -= 1
+    if not cert_text.endswith(_CERT_FOOTERS[kind], 0, end):
+        raise LicenseFileError("malformed certificate footer")
+    m = _CERT_BODY_RES[kind].match(cert_text, header.end())
+    if m is None:
         raise LicenseFileError("malformed certificate footer")
 
-    inner_b64 = _strip_and_join_base64(lines[1:-1])
+    inner_b64 = _strip_base64_whitespace(m.group("body"))
     try:
         decoded = b64_any_decode(inner_b64)
     except Exception as exc:
@@ -118,7 +174,7 @@ def parse_certificate(cert_text: str) -> Certificate:
     if not isinstance(alg, str) or not isinstance(enc, str) or (sig is not None and not isinstance(sig, str)):
         raise LicenseFileError("invalid certificate fields")
 
-    return Certificate(kind=kind, alg=alg, enc=enc, sig=sig, meta=meta, raw_text=cert_text)
+    return Certificate(kind=kind, alg=alg, enc=enc, sig=sig, meta=meta)
 
 def verify_signature(cert: Certificate, public_key_hex: Optional[str]) -> None:
     """
@@ -130,9 +186,23 @@ def verify_signature(cert: Certificate, public_key_hex: Optional[str]) -> None:
     """
     if not public_key_hex or not cert.sig:
         return
-    verify_key = Ed25519PublicKey.from_public_bytes(bytes.fromhex(public_key_hex))
+    _verify_certificate(cert, cert.sig, _load_ed25519(public_key_hex))
+
+def verify_signature_bytes(cert: Certificate, public_key: Optional[bytes]) -> None:
+    """
+    Same as verify_signature, for callers that already hold the raw 32-byte key.
+    No-op if public_key or cert.sig is None.
+
+    Raises:
+        cryptography.exceptions.InvalidSignature
+    """
+    if not public_key or not cert.sig:
+        return
+    _verify_certificate(cert, cert.sig, _load_ed25519_bytes(bytes(public_key)))
+
+def _verify_certificate(cert: Certificate, sig: str, verify_key: Ed25519PublicKey) -> None:
     message = f"{cert.kind.lower()}/{cert.enc}".encode("utf-8")
-    verify_key.verify(b64_any_decode(cert.sig), message)
+    verify_key.verify(b64_any_decode(sig), message)
 
 def verify_http_response_signature(
     res,
@@ -146,7 +216,7 @@ def verify_http_response_signature(
     Verify Keygen response signature and digest.
 
     Parameters
-    - res: requests.Response-like object (needs .text and .headers)
+    - res: requests.Response-like object (needs .content and .headers)
     - uri: request URI path used for signing (e.g., '/v1/accounts/<id>/licenses')
     - public_key_hex: hex-encoded Ed25519 public key
     - host: expected host value in the signing string (default 'api.keygen.sh')
@@ -162,10 +232,10 @@ def verify_http_response_signature(
         raise ValueError("signature is missing")
 
     params: dict[str, str] = {}
-    for part in re.split(r"\s*,\s*", signature_hdr):
-        if "=" not in part:
+    for part in signature_hdr.split(","):
+        k, sep, v = part.partition("=")
+        if not sep:
             continue
-        k, v = part.split("=", 1)
         params[k.strip()] = v.strip().strip('"')
 
     if params.get("algorithm") != "ed25519":
@@ -175,31 +245,31 @@ def verify_http_response_signature(
     if not sig_b64:
         raise ValueError("signature parameter missing")
 
-    # 2) Verify Digest header
-    body_sha256_b64 = base64.b64encode(hashlib.sha256(res.text.encode()).digest()).decode()
-    digest_value = f"sha-256={body_sha256_b64}"
-    if digest_value != res.headers.get("Digest"):
+    # 2) Verify Digest header (computed over the on-wire body bytes; no str round trip)
+    digest_value = _SIG_DIGEST_PREFIX + base64.b64encode(_sha256(res.content))
+    received_digest = (res.headers.get("Digest") or "").encode("utf-8")
+    if not hmac.compare_digest(digest_value, received_digest):
         raise ValueError("digest did not match")
 
-    # 3) Build signing data
+    # 3) Build signing data (directly as bytes)
     date = res.headers.get("Date")
     if not date:
         raise ValueError("Date header missing")
 
-    signing_data = "".join(
+    signing_data = b"".join(
         [
-            f"(request-target): {method} {quote(uri, safe='/?=&')}\n",
-            f"host: {host}\n",
-            f"date: {date}\n",
-            f"digest: {digest_value}",
+            _SIG_REQUEST_TARGET, method.encode("utf-8"), b" ", _quote_request_target(uri).encode("utf-8"),
+            _SIG_HOST, host.encode("utf-8"),
+            _SIG_DATE, date.encode("utf-8"),
+            _SIG_DIGEST, digest_value,
         ]
     )
 
     # 4) Verify Ed25519 signature
-    verify_key = Ed25519PublicKey.from_public_bytes(bytes.fromhex(public_key_hex))
+    verify_key = _load_ed25519(public_key_hex)
     verify_key.verify(
         base64.b64decode(sig_b64),
-        signing_data.encode(),
+        signing_data,
     )
 
 def decrypt_payload(
@@ -215,19 +285,49 @@ def decrypt_payload(
       - LICENSE file secret = SHA256(license.key)
       - MACHINE file secret = SHA256(license.key + machine.fingerprint)
     """
-    alg = cert.alg
-    if alg.startswith("aes-256-gcm"):
-        if cert.kind == "LICENSE":
-            secret_material = license_key
-        elif cert.kind == "MACHINE":
-            if not machine_fingerprint:
-                raise LicenseFileError("machine_fingerprint is required to decrypt a MACHINE file")
-            secret_material = f"{license_key}{machine_fingerprint}"
-        else:
-            raise LicenseFileError(f"Unknown certificate kind: {cert.kind}")
+    secret = None
+    if cert.alg.startswith("aes-256-gcm"):
+        secret = _sha256(_secret_material(cert, license_key, machine_fingerprint))
+    return _decrypt_payload(cert, secret)
+
+def decrypt_payloads(
+    items: Iterable[Tuple[Certificate, str, Optional[str]]],
+) -> List[Dict[str, Any]]:
+    """
+    Decrypt many certificates, e.g. for a fleet license audit.
 
-        secret = hashlib.sha256(secret_material.encode("utf-8")).digest()
+    Each item is (cert, license_key, machine_fingerprint). Decryption is still
+    sequential; the only saving over calling decrypt_payload per item is that
+    each AES key is derived once per distinct (license_key, fingerprint).
 
+    Raises LicenseFileError on the first failure, like decrypt_payload.
+    """
+    secrets: Dict[bytes, bytes] = {}
+    out: List[Dict[str, Any]] = []
+    for cert, license_key, machine_fingerprint in items:
+        secret = None
+        if cert.alg.startswith("aes-256-gcm"):
+            material = _secret_material(cert, license_key, machine_fingerprint)
+            secret = secrets.get(material)
+            if secret is None:
+                secret = secrets[material] = _sha256(material)
+        out.append(_decrypt_payload(cert, secret))
+    return out
+
+def _secret_material(cert: Certificate, license_key: str, machine_fingerprint: Optional[str]) -> bytes:
+    if cert.kind == "LICENSE":
+        return license_key.encode("utf-8")
+    if cert.kind == "MACHINE":
+        if not machine_fingerprint:
+            raise LicenseFileError("machine_fingerprint is required to decrypt a MACHINE file")
+        return f"{license_key}{machine_fingerprint}".encode("utf-8")
+    raise LicenseFileError(f"Unknown certificate kind: {cert.kind}")
+
+def _decrypt_payload(cert: Certificate, secret: Optional[bytes]) -> Dict[str, Any]:
+    alg = cert.alg
+    if alg.startswith("aes-256-gcm"):
+        if secret is None:
+            raise LicenseFileError("AES-GCM payload requires a derived secret")
         # enc = b64(ciphertext) . b64(iv_12B) . b64(tag_16B)
         try:
             ct_b64, iv_b64, tag_b64 = cert.enc.split(".")
@@ -235,8 +335,11 @@ def decrypt_payload(
             raise LicenseFileError("encrypted 'enc' format is invalid (expect 3 dot-separated parts)") from exc
         try:
             ct = b64_any_decode(ct_b64)
-            iv = b64_any_decode(iv_b64)
-            tag = b64_any_decode(tag_b64)
+            # IV and tag are short fixed-size fields: decode directly with
+            # surplus padding (ignored by binascii) instead of probing. The
+            # urlsafe decoder accepts both alphabets; lengths are checked below.
+            iv = base64.urlsafe_b64decode(iv_b64 + "==")
+            tag = base64.urlsafe_b64decode(tag_b64 + "==")
         except Exception as exc:
             raise LicenseFileError("invalid base64 in encrypted 'enc' parts") from exc
 
@@ -246,8 +349,13 @@ def decrypt_payload(
             raise LicenseFileError("invalid AES-GCM tag length (expected 16 bytes)")
 
         try:
-            aes = AESGCM(secret)
-            plaintext = aes.decrypt(iv, ct + tag, b"")
+            # GCM mode takes the tag directly, so ct is never copied to append it;
+            # finalize() performs the tag check before plaintext is used. GCM
+            # emits everything from update(), so finalize()'s b"" is not
+            # concatenated (that would copy the whole plaintext again).
+            decryptor = Cipher(algorithms.AES(secret), modes.GCM(iv, tag)).decryptor()
+            plaintext = decryptor.update(ct)
+            decryptor.finalize()
         except Exception as exc:
             raise LicenseFileError("AES-GCM decryption failed") from exc
         try:
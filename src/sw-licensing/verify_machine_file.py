@@ -2,53 +2,92 @@
 from fingerprint import generate_fingerprint
 import argparse
 import json
-import sys
-
-parser = argparse.ArgumentParser()
-parser.add_argument('--path', dest='path', required=True, help='Path to machine file (required)')
-parser.add_argument('--license-key', dest='license_key', required=True, help='License key (required)')
-parser.add_argument('--fingerprint', dest='fingerprint',
-                    default=generate_fingerprint(), help='Machine fingerprint')
-parser.add_argument("--pubkey", required=True, help="Ed25519 public key (hex) to verify signature")
-args = parser.parse_args()
+import mmap
+import os
 
 # Use shared implementation from keygen_files.py instead of duplicating logic
-from keygen_crypto import parse_certificate, verify_signature, decrypt_payload
-
-# Read the machine file
-try:
-    with open(args.path, 'r', encoding='utf-8') as f:
-        machine_file = f.read().rstrip()
-except (FileNotFoundError, PermissionError) as e:
-    print(f'[error] path does not exist or permission denied: {e}')
-    sys.exit(1)
-
-# Parse certificate
-try:
-    cert = parse_certificate(machine_file)
-except Exception as e:
-    print(f'[error] failed to parse machine file certificate: {e}')
-    sys.exit(1)
-
-# Verify signature
-try:
-    verify_signature(cert, args.pubkey)
-except Exception as e:
-    print(f'[error] certificate signature verification failed: {e}')
-    sys.exit(1)
-
-print('[info] certificate signature verification successful!')
-
-# Decrypt payload
-try:
-    payload = decrypt_payload(cert, license_key=args.license_key, machine_fingerprint=args.fingerprint)
-except Exception as e:
-    print(f'[error] decryption failed: {e}')
-    sys.exit(1)
-
-print('[info] decryption successful!')
-try:
-    # Expected to be a dict; pretty-print if possible
-    print(json.dumps(payload, indent=2))
-except Exception:
-    print(str(payload))
+from keygen_crypto import parse_certificate, verify_signature_bytes, decrypt_payload
+
+
+# Files at least this large are decoded straight from an mmap of the file,
+# skipping the intermediate bytes copy; below it, mmap setup costs more.
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def read_machine_file(path: str) -> str:
+    """Read a machine file as text, decoding once from the raw bytes.
+
+    No newline translation or rstrip() copy is needed: parse_certificate
+    tolerates CRLF and trailing whitespace.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+            return f.read().decode('utf-8')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return str(mm, 'utf-8')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', dest='path', required=True, help='Path to machine file (required)')
+    parser.add_argument('--license-key', dest='license_key', required=True, help='License key (required)')
+    parser.add_argument('--fingerprint', dest='fingerprint',
+                        default=None, help='Machine fingerprint (default: this machine)')
+    parser.add_argument("--pubkey", required=True, help="Ed25519 public key (hex) to verify signature")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    path = args.path
+    license_key = args.license_key
+    # Decode the key up front: a malformed --pubkey fails before any file I/O,
+    # and the raw bytes hit verify_signature_bytes' key-object cache directly.
+    try:
+        public_key = bytes.fromhex(args.pubkey)
+    except ValueError as e:
+        print(f'[error] invalid --pubkey (expected hex): {e}')
+        return 1
+
+    # Read the machine file
+    try:
+        machine_file = read_machine_file(path)
+    except (FileNotFoundError, PermissionError) as e:
+        print(f'[error] path does not exist or permission denied: {e}')
+        return 1
+
+    # Parse certificate
+    try:
+        cert = parse_certificate(machine_file)
+    except Exception as e:
+        print(f'[error] failed to parse machine file certificate: {e}')
+        return 1
+
+    # Verify signature
+    try:
+        verify_signature_bytes(cert, public_key)
+    except Exception as e:
+        print(f'[error] certificate signature verification failed: {e}')
+        return 1
+
+    print('[info] certificate signature verification successful!')
+
+    # Decrypt payload
+    try:
+        fingerprint = args.fingerprint or generate_fingerprint()
+        payload = decrypt_payload(cert, license_key=license_key, machine_fingerprint=fingerprint)
+    except Exception as e:
+        print(f'[error] decryption failed: {e}')
+        return 1
+
+    print('[info] decryption successful!')
+    try:
+        # Expected to be a dict; pretty-print if possible
+        print(json.dumps(payload, indent=2))
+    except Exception:
+        print(str(payload))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
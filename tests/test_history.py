@@ -0,0 +1,71 @@
+"""REPL history writer: atomic swap, mode preservation, temp-file cleanup.
+
+Run from the repo root: python -m unittest discover -s tests
+"""
+
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src" / "sw-licensing"))
+
+import cli  # noqa: E402
+
+
+class FakeReadline:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def write_history_file(self, path):
+        pathlib.Path(path).write_text("status\nwhoami\n", encoding="utf-8")
+        if self.fail:
+            raise OSError("disk full")
+
+
+class HistoryWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.history = self.dir / "sw-license.history"
+        self.tmp = self.dir / "sw-license.history.tmp"
+        for name, value in (("HISTORY_FILE", self.history), ("_history_dirty", True)):
+            patcher = unittest.mock.patch.object(cli, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, readline):
+        with unittest.mock.patch.object(cli, "_get_readline", return_value=readline):
+            cli._write_history_safely()
+
+    def test_replaces_and_keeps_mode(self):
+        self.history.write_text("old\n", encoding="utf-8")
+        os.chmod(self.history, 0o600)
+        self.write(FakeReadline())
+        self.assertEqual(self.history.read_text(encoding="utf-8"), "status\nwhoami\n")
+        self.assertEqual(self.history.stat().st_mode & 0o777, 0o600)
+        self.assertFalse(self.tmp.exists())
+
+    def test_creates_missing_file(self):
+        self.write(FakeReadline())
+        self.assertEqual(self.history.read_text(encoding="utf-8"), "status\nwhoami\n")
+        self.assertFalse(self.tmp.exists())
+
+    def test_failure_keeps_original_and_removes_tmp(self):
+        self.history.write_text("old\n", encoding="utf-8")
+        self.write(FakeReadline(fail=True))
+        self.assertEqual(self.history.read_text(encoding="utf-8"), "old\n")
+        self.assertFalse(self.tmp.exists())
+
+    def test_clean_session_leaves_file_alone(self):
+        self.history.write_text("old\n", encoding="utf-8")
+        with unittest.mock.patch.object(cli, "_history_dirty", False):
+            self.write(FakeReadline())
+        self.assertEqual(self.history.read_text(encoding="utf-8"), "old\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
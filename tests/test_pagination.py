@@ -0,0 +1,176 @@
+"""Pagination end conditions for KeygenClient.paginate_each / paginate_parallel.
+
+Run from the repo root: python -m unittest discover -s tests
+"""
+
+import json
+import pathlib
+import sys
+import threading
+import unittest
+import unittest.mock
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src" / "sw-licensing"))
+
+import cli  # noqa: E402
+
+
+class FakeKeygen(BaseAdapter):
+    """Serves /licenses pages of `n_items` ids, capping page[size] at `cap`."""
+
+    def __init__(self, n_items, cap=100, report_total=True, send_next=True):
+        super().__init__()
+        self.n_items = n_items
+        self.cap = cap
+        self.report_total = report_total
+        self.send_next = send_next
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        qs = parse_qs(url.query)
+        number = int(qs["page[number]"][0])
+        size = min(int(qs["page[size]"][0]), self.cap)
+        with self._lock:
+            self.requested.append(number)
+        start = (number - 1) * size
+        data = [{"id": str(i)} for i in range(start, min(start + size, self.n_items))]
+        n_pages = max(1, -(-self.n_items // size))
+        links = {"next": None}
+        if self.send_next and number < n_pages:
+            links["next"] = f"{url.path}?page[number]={number + 1}&page[size]={size}"
+        if self.report_total:
+            links["meta"] = {"pages": n_pages, "count": self.n_items}
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps({"data": data, "links": links}).encode("utf-8")
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+class PaginationTests(unittest.TestCase):
+    def setUp(self):
+        # Responses from the fake are unsigned
+        patcher = unittest.mock.patch.object(cli, "verify_http_response_signature")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client(self, fake):
+        client = cli.KeygenClient(cli.Config(base_url="http://keygen.test", account_id="acc"), "TOK")
+        client.session.mount("http://", fake)
+        return client
+
+    def collect_each(self, fake, page_size, **kwargs):
+        ids = []
+        kwargs.setdefault("all_pages", True)
+
+        def on_page(payload, _idx):
+            ids.extend(it["id"] for it in payload["data"])
+            return True
+
+        pages = self.client(fake).paginate_each(
+            "/licenses", None, page_size=page_size, page_number=kwargs.pop("page_number", 1),
+            max_pages=kwargs.pop("max_pages", 1), on_page=on_page, **kwargs,
+        )
+        return pages, ids
+
+    def collect_parallel(self, fake, page_size, stop_after=None, workers=2):
+        ids = []
+        order = []
+
+        def on_page(payload, idx):
+            order.append(idx)
+            ids.extend(it["id"] for it in payload["data"])
+            return stop_after is None or idx < stop_after
+
+        pages = self.client(fake).paginate_parallel(
+            "/licenses", None, page_size=page_size, on_page=on_page, workers=workers,
+        )
+        return pages, ids, order
+
+    def expected(self, n):
+        return [str(i) for i in range(n)]
+
+    # --- paginate_each ---
+
+    def test_each_follows_all_pages(self):
+        fake = FakeKeygen(250)
+        pages, ids = self.collect_each(fake, 100)
+        self.assertEqual(ids, self.expected(250))
+        self.assertEqual(pages, 3)
+
+    def test_each_skips_empty_tail_once_total_covered(self):
+        fake = FakeKeygen(200)
+        pages, ids = self.collect_each(fake, 100)
+        self.assertEqual(ids, self.expected(200))
+        self.assertEqual(fake.requested, [1, 2])
+
+    def test_each_capped_page_size(self):
+        fake = FakeKeygen(250, cap=100)
+        pages, ids = self.collect_each(fake, 500)
+        self.assertEqual(ids, self.expected(250))
+        self.assertEqual(pages, 3)
+
+    def test_each_capped_page_size_without_total(self):
+        fake = FakeKeygen(250, cap=100, report_total=False)
+        pages, ids = self.collect_each(fake, 500)
+        self.assertEqual(ids, self.expected(250))
+
+    def test_each_start_page_with_cap(self):
+        fake = FakeKeygen(250, cap=100)
+        pages, ids = self.collect_each(fake, 500, page_number=2)
+        self.assertEqual(ids, [str(i) for i in range(100, 250)])
+
+    def test_each_respects_max_pages(self):
+        fake = FakeKeygen(250)
+        pages, ids = self.collect_each(fake, 100, all_pages=False, max_pages=2)
+        self.assertEqual(ids, self.expected(200))
+        self.assertEqual(pages, 2)
+
+    # --- paginate_parallel ---
+
+    def test_parallel_in_order(self):
+        fake = FakeKeygen(1050)
+        pages, ids, order = self.collect_parallel(fake, 100)
+        self.assertEqual(ids, self.expected(1050))
+        self.assertEqual(order, list(range(1, 12)))
+        self.assertEqual(pages, 11)
+
+    def test_parallel_capped_page_size(self):
+        fake = FakeKeygen(250, cap=100)
+        pages, ids, _ = self.collect_parallel(fake, 500)
+        self.assertEqual(ids, self.expected(250))
+        self.assertEqual(pages, 3)
+
+    def test_parallel_missing_total_follows_links(self):
+        fake = FakeKeygen(250, cap=100, report_total=False)
+        pages, ids, order = self.collect_parallel(fake, 500)
+        self.assertEqual(ids, self.expected(250))
+        self.assertEqual(order, [1, 2, 3])
+
+    def test_parallel_single_page(self):
+        fake = FakeKeygen(40)
+        pages, ids, _ = self.collect_parallel(fake, 100)
+        self.assertEqual(ids, self.expected(40))
+        self.assertEqual(fake.requested, [1])
+
+    def test_parallel_stop_bounds_requests(self):
+        fake = FakeKeygen(100 * 50)
+        pages, ids, order = self.collect_parallel(fake, 100, stop_after=2, workers=2)
+        self.assertEqual(order, [1, 2])
+        self.assertEqual(pages, 2)
+        # Only the in-flight window (workers * 2) may have been requested past page 2
+        self.assertLessEqual(max(fake.requested), 2 + 2 * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()